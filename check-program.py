@@ -7,21 +7,29 @@ import argparse
 import subprocess
 import tempfile
 import configparser
-from pathlib import Path
+import concurrent.futures
+import functools
+import hashlib
+import sqlite3
+import re
 from itertools import chain
 
 PATHS = {}
 
-def read_config():
+@functools.lru_cache(maxsize=None)
+def load_config():
   config = configparser.RawConfigParser()
-  cfgpath = str(Path.home()) + "/.glibc-tools.ini"
+  cfgpath = os.path.expanduser("~/.glibc-tools.ini")
   config.read(cfgpath)
   if 'glibc-tools' not in config.sections() \
     or 'compilers' not in config['glibc-tools']:
     print("error: config invalid, run glibc-tools-config.py")
     sys.exit(1)
+  return dict(config['glibc-tools'])
+
+def read_config():
   global PATHS
-  PATHS = config._sections['glibc-tools']
+  PATHS = dict(load_config())
 
 ABIS = { "aarch64"      : "aarch64",
          "arc"          : "arc",
@@ -53,6 +61,9 @@ ABIS = { "aarch64"      : "aarch64",
          "x86_64-x32"   : "x86_64 -mx32"
 }
 
+ABIS_SORTED = tuple(sorted(ABIS))
+
+@functools.lru_cache(maxsize=None)
 def get_compiler_path(abi):
   cfields = ABIS[abi].split()
   cprefix = cfields[0]
@@ -72,37 +83,225 @@ def get_compiler_path(abi):
     return [ compiler, cfields[1] ]
   return [ compiler ] 
 
-def create_temp_file(syscall):
+@functools.lru_cache(maxsize=None)
+def have_compiler(path):
+  return os.path.isfile(path) and os.access(path, os.X_OK)
+
+SYSCALL_HEADER = """#define _GNU_SOURCE
+#include <unistd.h>
+#include <sys/syscall.h>
+"""
+
+CFLAGS = [ '-O2', '-std=gnu11' ]
+
+# Use the C locale so the compiler diagnostics can be parsed.
+COMPILER_ENV = dict(os.environ, LC_ALL='C')
+
+def run_compiler(cmd, stderr=subprocess.DEVNULL):
+  # All the file descriptors opened by python are non-inheritable, so skip
+  # the descriptor sweep done on each spawn.
+  return subprocess.run(cmd, check=False, stdout=subprocess.DEVNULL,
+                        stderr=stderr, env=COMPILER_ENV, close_fds=False)
+
+@functools.lru_cache(maxsize=None)
+def build_pch(compiler):
+  """Create the precompiled SYSCALL_HEADER for COMPILER (a tuple with the
+     compiler and its options) and return the header path to use with
+     -include.  The header is cached on ~/.cache/glibc-tools/pch keyed by
+     the compiler path, options, and modification time."""
+  key = hashlib.sha1()
+  key.update(" ".join(compiler).encode("utf-8"))
+  key.update(str(os.stat(compiler[0]).st_mtime).encode("utf-8"))
+  pchdir = os.path.join(os.path.expanduser("~/.cache/glibc-tools/pch"),
+                        key.hexdigest())
+  header = os.path.join(pchdir, "syscall.h")
+  if os.path.exists(header + ".gch"):
+    return header
+
+  os.makedirs(pchdir, exist_ok=True)
+  with open(header, "w") as f:
+    f.write(SYSCALL_HEADER)
+  tmpgch = "%s.gch.%d" % (header, os.getpid())
+  cmd = list(compiler) + CFLAGS + [ '-x', 'c-header', header, '-o', tmpgch ]
+  ret = run_compiler(cmd)
+  # Without the .gch the compiler just parses the header as usual.
+  if ret.returncode == 0:
+    os.replace(tmpgch, header + ".gch")
+  elif os.path.exists(tmpgch):
+    os.remove(tmpgch)
+  return header
+
+class MemFile(object):
+  """An in-memory file, accessed by other processes through /proc."""
+
+  def __init__(self, content):
+    self.fd = os.memfd_create("syscall.c")
+    os.write(self.fd, content.encode("utf-8"))
+    self.name = "/proc/%d/fd/%d" % (os.getpid(), self.fd)
+
+  def close(self):
+    os.close(self.fd)
+
+def create_temp_file(syscalls):
+  src = ""
+  for syscall in syscalls:
+    src += "#ifdef SYS_%s\n" % syscall
+    src += "int foo_%s (void)\n" % syscall
+    src += "{\n"
+    src += "  return syscall (SYS_%s);\n" % syscall
+    src += "}\n"
+    src += "#else\n"
+    src += "# error \"SYS_%s missing\"\n" % syscall
+    src += "#endif\n"
+  # memfd_create is Linux only and was added in python 3.8.
+  if hasattr(os, "memfd_create"):
+    return MemFile(src)
   f = tempfile.NamedTemporaryFile("w", suffix=".c")
-  f.write("#define _GNU_SOURCE\n")
-  f.write("#include <unistd.h>\n")
-  f.write("#include <sys/syscall.h>\n")
-  f.write("int foo (void)\n")
-  f.write("{\n")
-  f.write("  return syscall (SYS_%s);\n" % syscall)
-  f.write("}\n")
+  f.write(src)
   f.flush()
   return f
 
-def build_check(compiler, sysfile, abi):
-  output = "{}-{}.S".format(os.path.splitext(sysfile.name)[0], abi)
-  cmd = compiler + [ '-O2', '-std=gnu11', '-c', sysfile.name, '-S', '-o', output ]
-  fnull = open(os.devnull, 'w')
-  ret = subprocess.run(cmd, check=False, stdout=fnull, stderr=fnull)
+def build_check(compiler, sysfile):
+  if not have_compiler(compiler[0]):
+    return "NOCC"
+  # Only the front end result is used, so skip the code generation.
+  cmd = compiler + CFLAGS + [ '-fsyntax-only', sysfile.name ]
+  ret = run_compiler(cmd)
+  return "OK" if ret.returncode == 0 else "FAIL"
+
+# The diagnostic issued by create_temp_file for a missing syscall.
+MISSING_SYSCALL = re.compile(r'error: #error "SYS_(\w+) missing"')
+
+def build_check_syscalls(compiler, sysfile, syscalls):
+  """Build all the syscalls in SYSFILE at once and return a dict with the
+     result for each one, and whether the result comes from a single
+     build that only failed on missing syscalls (so it can be cached)."""
+  if not have_compiler(compiler[0]):
+    return dict.fromkeys(syscalls, "NOCC"), False
+  header = build_pch(tuple(compiler))
+  cmd = compiler + CFLAGS + [ '-include', header, '-fsyntax-only',
+                              '-fmax-errors=0', '-x', 'c' ]
+  ret = run_compiler(cmd + [ sysfile.name ], stderr=subprocess.PIPE)
+  if ret.returncode == 0:
+    return dict.fromkeys(syscalls, "OK"), True
+  err = ret.stderr.decode("utf-8", errors="replace")
+  missing = set()
+  for line in err.splitlines():
+    if 'error:' not in line:
+      continue
+    m = MISSING_SYSCALL.search(line)
+    if not m or m.group(1) not in syscalls:
+      missing = None
+      break
+    missing.add(m.group(1))
+  if missing:
+    return { s : "FAIL" if s in missing else "OK" for s in syscalls }, True
+
+  # Some other error (for instance a missing header), so build each
+  # syscall on its own to find out which ones work.
+  results = {}
+  for syscall in syscalls:
+    f = create_temp_file([ syscall ])
+    ret = run_compiler(cmd + [ f.name ])
+    f.close()
+    results[syscall] = "OK" if ret.returncode == 0 else "FAIL"
+  return results, False
+
+SYSCALL_CACHE = os.path.expanduser("~/.cache/glibc-tools/syscall.db")
+
+def open_syscall_cache():
+  os.makedirs(os.path.dirname(SYSCALL_CACHE), exist_ok=True)
+  db = sqlite3.connect(SYSCALL_CACHE)
+  db.execute("CREATE TABLE IF NOT EXISTS syscalls "
+             "(key TEXT PRIMARY KEY, result TEXT)")
+  return db
+
+@functools.lru_cache(maxsize=None)
+def headers_mtime(compiler):
+  """Return the newest modification time of the headers used by
+     SYSCALL_HEADER with COMPILER (a tuple with the compiler and its
+     options), so an updated sysroot or kernel headers are noticed.
+     Return None if the dependencies can not be obtained."""
+  ret = subprocess.run(list(compiler) + CFLAGS + [ '-M', '-x', 'c', '-' ],
+                       input=SYSCALL_HEADER.encode("utf-8"),
+                       stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                       env=COMPILER_ENV, close_fds=False)
   if ret.returncode != 0:
-    return "FAIL"
-  return "OK"
+    return None
+  deps = ret.stdout.decode("utf-8").replace("\\\n", " ").split()[1:]
+  try:
+    return max(os.stat(dep).st_mtime_ns for dep in deps)
+  except (OSError, ValueError):
+    return None
+
+def syscall_cache_keys(compiler, syscalls):
+  """Return the cache key for each syscall built with COMPILER, based on
+     the compiler path, options, and modification time, and on the
+     modification time of the system headers."""
+  if not have_compiler(compiler[0]):
+    return {}
+  hmtime = headers_mtime(tuple(compiler))
+  if hmtime is None:
+    return {}
+  prefix = " ".join(compiler) + str(os.stat(compiler[0]).st_mtime_ns) \
+           + str(hmtime)
+  return { s : hashlib.sha1((prefix + s).encode("utf-8")).hexdigest()
+           for s in syscalls }
+
+def lookup_syscall_cache(db, keys):
+  results = {}
+  for syscall, key in keys.items():
+    row = db.execute("SELECT result FROM syscalls WHERE key = ?",
+                     (key,)).fetchone()
+    if row:
+      results[syscall] = row[0]
+  return results
 
 def check_syscall(args):
-  for syscall in args.syscalls:
-    sysfile = create_temp_file(syscall)
+  # Each syscall is defined once in the source file.
+  syscalls = list(dict.fromkeys(args.syscalls))
+  db = open_syscall_cache()
+  keys = {}
+  results = {}
+  for abi in ABIS_SORTED:
+    try:
+      keys[abi] = syscall_cache_keys(get_compiler_path(abi), syscalls)
+    except:
+      keys[abi] = {}
+    cached = lookup_syscall_cache(db, keys[abi])
+    if len(cached) == len(syscalls):
+      results[abi] = cached
+
+  def run(abi):
+    try:
+      compiler = get_compiler_path(abi)
+      return (abi,) + build_check_syscalls(compiler, sysfile, syscalls)
+    except:
+      return (abi, dict.fromkeys(syscalls, "compiler not found"), False)
+
+  pending = [abi for abi in ABIS_SORTED if abi not in results]
+  if pending:
+    sysfile = create_temp_file(syscalls)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) \
+         as executor:
+      futures = [executor.submit(run, abi) for abi in pending]
+      for f in concurrent.futures.as_completed(futures):
+        abi, result, cacheable = f.result()
+        results[abi] = result
+        # Only the results of a build that failed just on the missing
+        # syscalls are known to not depend on some other error.
+        if cacheable:
+          db.executemany("INSERT OR REPLACE INTO syscalls VALUES (?, ?)",
+                         [(keys[abi][s], r) for s, r in result.items()
+                          if s in keys[abi]])
+    sysfile.close()
+    db.commit()
+  db.close()
+
+  for syscall in syscalls:
     print ("SYSCALL: %s" % syscall)
-    for abi in sorted(ABIS.keys()):
-      try:
-        compiler = get_compiler_path(abi)
-        print ("  %20s: %s" % (abi, build_check(compiler, sysfile, abi)))
-      except:
-        print ("  %20s: compiler not found" % abi)
+    for abi in ABIS_SORTED:
+      print ("  %20s: %s" % (abi, results[abi][syscall]))
 
 def check_file(args):
   for prog in args.programs:
@@ -112,9 +311,9 @@ def check_file(args):
       print ("FAIL: file %s can not be opened" % (prog))
       return
     print ("FILE: %s" % prog)
-    for abi in sorted(ABIS.keys()):
+    for abi in ABIS_SORTED:
       compiler = get_compiler_path(abi)
-      print ("  %20s: %s" % (abi, build_check(compiler, sysfile, abi)))
+      print ("  %20s: %s" % (abi, build_check(compiler, sysfile)))
 
 def get_parser():
   parser = argparse.ArgumentParser(description=__doc__)
@@ -132,12 +331,12 @@ def get_parser():
   return parser
 
 def main(argv):
-  read_config()
   parser = get_parser()
   args = parser.parse_args(argv)
   if len(vars(args)) == 0:
       parser.print_help();
       sys.exit(0)
+  read_config()
   args.func(args)
 
 if __name__ == "__main__":
@@ -1,18 +1,26 @@
 #! /usr/bin/env python3
 
 import sys
+import os
 import argparse
 import subprocess
-import tempfile
 import configparser
 import re
-from pathlib import Path
+import difflib
+import filecmp
+import io
+import mmap
+import struct
+import functools
+import concurrent.futures
+from itertools import zip_longest
 
 PATHS = {}
 
-def read_config():
+@functools.lru_cache(maxsize=None)
+def load_config():
   config = configparser.RawConfigParser()
-  cfgpath = str(Path.home()) + "/.glibc-tools.ini"
+  cfgpath = os.path.expanduser("~/.glibc-tools.ini")
   config.read(cfgpath)
   if 'glibc-tools' not in config.sections() \
      or 'srcdir' not in config['glibc-tools'] \
@@ -21,15 +29,52 @@ def read_config():
      or 'compilers' not in config['glibc-tools']:
     print("error: config invalid, run glibc-tools-config.py")
     sys.exit(1)
+  return dict(config['glibc-tools'])
+
+def read_config():
   global PATHS
-  PATHS = config._sections['glibc-tools']
+  PATHS = dict(load_config())
+
+# e_machine values to the names used by file(1).
+ELF_MACHINES = {
+  3   : "Intel 80386",
+  8   : "MIPS",
+  20  : "PowerPC or cisco 4500",
+  21  : "64-bit PowerPC or cisco 7500",
+  22  : "IBM S/390",
+  40  : "ARM",
+  43  : "SPARC V9",
+  62  : "x86-64",
+  183 : "ARM aarch64",
+  243 : "UCB RISC-V",
+}
 
+# e_type values to the names used by file(1).
+ELF_TYPES = {
+  1 : "relocatable",
+  2 : "executable",
+  3 : "shared object",
+}
+
+@functools.lru_cache(maxsize=None)
 def elf_architecture(filename):
-  fields = subprocess.check_output(['file', filename]).decode("utf-8")
-  fields = fields.split(':')[1].split(',')
-  if not fields[0].strip().startswith('ELF'):
+  """Return the [ELF class/type description, machine] pair in the same
+     format as file(1) by reading the ELF header directly."""
+  try:
+    with open(filename, 'rb') as f:
+      header = f.read(20)
+  except OSError:
+    return None
+  if len(header) < 20 or header[:4] != b'\x7fELF':
     return None
-  return [fields[0].strip(), fields[1].strip()]
+  elfclass = '64' if header[4] == 2 else '32'
+  byteorder = 'little' if header[5] == 1 else 'big'
+  etype = int.from_bytes(header[16:18], byteorder)
+  machine = int.from_bytes(header[18:20], byteorder)
+  desc = "ELF %s-bit %s %s" % (elfclass,
+                                'LSB' if byteorder == 'little' else 'MSB',
+                                ELF_TYPES.get(etype, "type %d" % etype))
+  return [desc, ELF_MACHINES.get(machine, "machine %d" % machine)]
 
 def tool_path(arch, tool):
   architectures = {
@@ -42,7 +87,7 @@ def tool_path(arch, tool):
   if not arch[1] in architectures:
     raise Exception("Architecture %s not support for tool %s" % (arch[1], tool))
 
-  if type(architectures[arch[1]][arch[0]]) is list:
+  if type(architectures[arch[1]]) is dict:
     prefix1 = architectures[arch[1]][arch[0]][0]
     prefix2 = architectures[arch[1]][arch[0]][1]
   else:
@@ -51,44 +96,118 @@ def tool_path(arch, tool):
 
   return PATHS['compilers'] + '/' + prefix1 + '/bin/' + prefix2 + '-' + tool
 
-def symbol_in_list(symbol, symbols):
-  rgx = r'\b' + symbol + r'\b'
-  r = re.compile(rgx)
-  for sym in symbols:
-    s = re.search(rgx, sym)
-    if not s:
+@functools.lru_cache(maxsize=None)
+def symbol_table(nm, filename):
+  """Return a dict mapping each symbol of FILENAME to its [start, end)
+     address range."""
+  out = subprocess.check_output([nm, "-S", '--size-sort', filename])
+  symtab = {}
+  for line in out.decode('utf-8').splitlines():
+    fields = line.split()
+    if len(fields) < 4:
       continue
-    fields = sym.split()
     start = int(fields[0], 16)
     size  = int(fields[1], 16)
-    return [ start, start + size ]
+    # Keep the first entry of a duplicated name, as the linear search did.
+    symtab.setdefault(fields[-1], [ start, start + size ])
+  return symtab
+
+def symbol_in_list(symbol, symtab):
+  if symbol in symtab:
+    return symtab[symbol]
+  # Fallback to a word match, for instance for versioned symbol names.
+  r = re.compile(r'\b' + re.escape(symbol) + r'\b')
+  for sym in symtab:
+    if r.search(sym):
+      return symtab[sym]
+
+def symbol_bytes(filename, start, end):
+  """Return the contents of the [START, END) virtual address range of
+     FILENAME, or None if no section maps it."""
+  with open(filename, 'rb') as f:
+    m = mmap.mmap(f.fileno(), 0, prot=mmap.PROT_READ)
+  try:
+    order = '<' if m[5] == 1 else '>'
+    if m[4] == 2:
+      shoff, = struct.unpack_from(order + 'Q', m, 0x28)
+      shentsize, shnum = struct.unpack_from(order + 'HH', m, 0x3a)
+      shfmt = order + 'IIQQQQ'
+    else:
+      shoff, = struct.unpack_from(order + 'I', m, 0x20)
+      shentsize, shnum = struct.unpack_from(order + 'HH', m, 0x2e)
+      shfmt = order + 'IIIIII'
+    for i in range(shnum):
+      _, shtype, _, addr, offset, size = struct.unpack_from(shfmt, m,
+                                          shoff + i * shentsize)
+      # Skip SHT_NULL and SHT_NOBITS.
+      if shtype in (0, 8) or addr == 0:
+        continue
+      if addr <= start and end <= addr + size:
+        return m[offset + start - addr:offset + end - addr]
+    return None
+  finally:
+    m.close()
+
+# Symbols up to this size are diffed with difflib instead of diff.
+DIFFLIB_MAX_CODE_SIZE = 16 * 1024
 
-def run_objdump_diff(file1, file2, symbol):
+def side_by_side(lines1, lines2, width=61):
+  """Return the lines of a diff -y like output of LINES1 and LINES2."""
+  def line(left, mark, right):
+    return ("%-*s %s %s" % (width, left[:width], mark, right[:width])).rstrip()
+
+  lines1 = [l.expandtabs() for l in lines1]
+  lines2 = [l.expandtabs() for l in lines2]
+  sm = difflib.SequenceMatcher(None, lines1, lines2, autojunk=False)
+  for tag, i1, i2, j1, j2 in sm.get_opcodes():
+    if tag == 'equal':
+      for l, r in zip(lines1[i1:i2], lines2[j1:j2]):
+        yield line(l, ' ', r)
+    else:
+      for l, r in zip_longest(lines1[i1:i2], lines2[j1:j2]):
+        if r is None:
+          yield line(l, '<', '')
+        elif l is None:
+          yield line('', '>', r)
+        else:
+          yield line(l, '|', r)
+
+def run_objdump_diff(file1, file2, symbol, out=sys.stdout):
   arch1 = elf_architecture (file1)
   arch2 = elf_architecture (file2)
   if not arch1 or not arch2:
-    print("error: invalid input object file")
+    print("error: invalid input object file", file=out)
     return
   if arch1[0] != arch2[0] or arch1[1] != arch2[1]:
     print("error: ELF files have different architectures ([%s, %s], [%s, %s])" %
-          (arch1[0], arch2[0], arch1[1], arch2[1]))
+          (arch1[0], arch2[0], arch1[1], arch2[1]), file=out)
+    return
+
+  # Identical files have an empty diff.
+  if filecmp.cmp(file1, file2, shallow=False):
+    print ("%s and %s are identical" % (file1, file2), file=out)
     return
 
   objdump = tool_path(arch1, 'objdump')
-  print (objdump)
+  print (objdump, file=out)
   objdump_args1 = []
   objdump_args2 = []
 
   if symbol:
     nm = tool_path(arch1, 'nm')
 
-    out1 = subprocess.check_output([nm, "-S", '--size-sort', file1])
-    out1 = out1.decode('utf-8').splitlines()
-    range1 = symbol_in_list (symbol, out1)
+    # Both objdump already run concurrently, do the same for nm.
+    with concurrent.futures.ThreadPoolExecutor(max_workers=2) as executor:
+      symtab1, symtab2 = executor.map(lambda f: symbol_table(nm, f),
+                                      [file1, file2])
+    range1 = symbol_in_list (symbol, symtab1)
+    range2 = symbol_in_list (symbol, symtab2)
 
-    out2 = subprocess.check_output([nm, "-S", '--size-sort', file2])
-    out2 = out2.decode('utf-8').splitlines()
-    range2 = symbol_in_list (symbol, out2)
+    # There is no need to disassemble if the symbol code is the same.
+    code1 = symbol_bytes(file1, range1[0], range1[1])
+    if code1 is not None and code1 == symbol_bytes(file2, range2[0], range2[1]):
+      print ("%s: identical" % symbol, file=out)
+      return
 
     objdump_args1 += [ '--section=.text',
                        '--start-address=0x%x' % range1[0],
@@ -97,29 +216,57 @@ def run_objdump_diff(file1, file2, symbol):
                        '--start-address=0x%x' % range2[0],
                        '--stop-address=0x%x' % range2[1] ]
 
-  mode = None
-  try:
-    tmp1 = tempfile.NamedTemporaryFile()
-    out1 = subprocess.check_output([objdump, "-d", file1] + objdump_args1)
-    tmp1.write(out1)
-    tmp1.flush()
+  cmd1 = [objdump, "-d", file1] + objdump_args1
+  cmd2 = [objdump, "-d", file2] + objdump_args2
 
-    tmp2 = tempfile.NamedTemporaryFile()
-    out2 = subprocess.check_output([objdump, "-d", file2] + objdump_args2)
-    tmp2.write(out2)
-    tmp2.flush()
+  # The disassembly of a small symbol is cheaper to diff in-process than
+  # to spawn diff.
+  if symbol and range1[1] - range1[0] + range2[1] - range2[0] \
+                < DIFFLIB_MAX_CODE_SIZE:
+    p1 = subprocess.Popen(cmd1, stdout=subprocess.PIPE)
+    p2 = subprocess.Popen(cmd2, stdout=subprocess.PIPE)
+    out1, _ = p1.communicate()
+    out2, _ = p2.communicate()
+    for p, cmd in ((p1, cmd1), (p2, cmd2)):
+      if p.returncode != 0:
+        print ("error: %s failed" % (cmd), file=out)
+        return
+    for l in side_by_side(out1.decode('utf-8').splitlines(),
+                          out2.decode('utf-8').splitlines()):
+      print (l, file=out)
+    return
 
-    diffp = subprocess.Popen(["diff", "-y", tmp1.name, tmp2.name],
+  # Feed both objdump outputs directly to diff through the pipe file
+  # descriptors, so neither disassembly is buffered in memory.
+  p1 = subprocess.Popen(cmd1, stdout=subprocess.PIPE)
+  p2 = subprocess.Popen(cmd2, stdout=subprocess.PIPE)
+  try:
+    fd1 = p1.stdout.fileno()
+    fd2 = p2.stdout.fileno()
+    diffp = subprocess.Popen(["diff", "-y", "/dev/fd/%d" % fd1,
+                              "/dev/fd/%d" % fd2],
+                             pass_fds=(fd1, fd2),
                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    p1.stdout.close()
+    p2.stdout.close()
     diff, err = diffp.communicate()
-    sys.stdout.buffer.write(diff)
+
+    for p, cmd in ((p1, cmd1), (p2, cmd2)):
+      if p.wait() != 0:
+        raise subprocess.CalledProcessError(p.returncode, cmd)
+    out.flush()
+    out.buffer.write(diff)
 
   except subprocess.CalledProcessError as e:
-    print ("error: %s failed" % (e.cmd))
+    print ("error: %s failed" % (e.cmd), file=out)
 
   finally:
-    tmp1.close()
-    tmp2.close()
+    # Also close the pipes if diff could not be started, so objdump does
+    # not block writing to them.
+    p1.stdout.close()
+    p2.stdout.close()
+    p1.wait()
+    p2.wait()
 
 
 def parser_arguments(argv):
@@ -135,11 +282,25 @@ def parser_arguments(argv):
 
 
 def main(argv):
+  opts = parser_arguments(argv)
+
   read_config()
 
-  opts = parser_arguments(argv)
+  if len(opts.files) == 2:
+    run_objdump_diff(opts.files[0], opts.files[1], opts.symbol)
+    return
+
+  # Diff each remaining file against the first one, buffering each output
+  # so they are not interleaved.
+  def diff_against(f):
+    out = io.TextIOWrapper(io.BytesIO(), write_through=True)
+    run_objdump_diff(opts.files[0], f, opts.symbol, out)
+    return out.buffer.getvalue()
 
-  run_objdump_diff(opts.files[0], opts.files[1], opts.symbol)
+  with concurrent.futures.ThreadPoolExecutor(
+         max_workers=min(os.cpu_count() or 1, len(opts.files) - 1)) as executor:
+    for diff in executor.map(diff_against, opts.files[1:]):
+      sys.stdout.buffer.write(diff)
 
 if __name__ == "__main__":
   main(sys.argv[1:])
@@ -8,13 +8,15 @@ import fnmatch
 import tempfile
 from itertools import chain
 import configparser
-from pathlib import Path
+import concurrent.futures
+import functools
 
 PATHS = {}
 
-def read_config():
+@functools.lru_cache(maxsize=None)
+def load_config():
   config = configparser.RawConfigParser()
-  cfgpath = str(Path.home()) + "/.glibc-tools.ini"
+  cfgpath = os.path.expanduser("~/.glibc-tools.ini")
   config.read(cfgpath)
   if 'glibc-tools' not in config.sections() \
      or 'srcdir' not in config['glibc-tools'] \
@@ -23,16 +25,114 @@ def read_config():
      or 'compilers' not in config['glibc-tools']:
     print("error: config invalid, run glibc-tools-config.py")
     sys.exit(1)
+  return dict(config['glibc-tools'])
+
+def read_config():
   global PATHS
-  PATHS = config._sections['glibc-tools']
+  PATHS = dict(load_config())
+
 
+def scan_files(rootdir, match):
+  try:
+    entries = list(os.scandir(rootdir))
+  except OSError:
+    return
+  for entry in entries:
+    if entry.is_dir(follow_symlinks=False):
+      yield from scan_files(entry.path, match)
+    elif match(entry.name) and entry.is_file():
+      yield entry.path
 
+@functools.lru_cache(maxsize=None)
 def recursive_glob(rootdir='.', pattern='*'):
-  matches = []
-  for root, dirnames, filenames in os.walk(rootdir):
-    for filename in fnmatch.filter(filenames, pattern):
-      matches.append(os.path.join(root, filename))
-  return matches
+  # Avoid fnmatch for the usual suffix only pattern.
+  if pattern.startswith('*') and not any(c in pattern[1:] for c in '*?['):
+    suffix = pattern[1:]
+    match = lambda name: name.endswith(suffix)
+  else:
+    match = lambda name: fnmatch.fnmatch(name, pattern)
+  # Sort so the base and patched files are paired by their path.
+  return tuple(sorted(scan_files(rootdir, match)))
+
+def disassemble(objdump, files, tmpdir):
+  """Disassemble FILES with a single objdump call and return the name of
+     a file in TMPDIR with the disassembly of each one, split at the
+     objdump file banners."""
+  cmd = [objdump, "-d"] + files
+  banners = [f.encode("utf-8") + b":" for f in files]
+  dumps = []
+  out = None
+  proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, close_fds=False)
+  try:
+    for line in proc.stdout:
+      if len(dumps) < len(files) and line.startswith(banners[len(dumps)]) \
+         and b"file format" in line:
+        # Only one file is kept open, a chunk has hundreds of them.
+        if out is not None:
+          out.close()
+        out = tempfile.NamedTemporaryFile(dir=tmpdir, delete=False)
+        dumps.append(out.name)
+      if out is not None:
+        out.write(line)
+  finally:
+    if out is not None:
+      out.close()
+    proc.stdout.close()
+    proc.wait()
+  if proc.returncode != 0 or len(dumps) != len(files):
+    raise subprocess.CalledProcessError(proc.returncode, cmd)
+  return dumps
+
+def diff_dumps(basefile, patchfile, dumpb, dumpp):
+  ret = subprocess.run(["diff", "-u", "--label", basefile, "--label",
+                        patchfile, dumpb, dumpp],
+                       stdout=subprocess.PIPE, close_fds=False)
+  os.remove(dumpb)
+  os.remove(dumpp)
+  return ret.stdout
+
+def diff_files(objdump, basefiles, patchfiles):
+  """Return a list with the unified diff of the disassembly of each pair
+     of BASEFILES and PATCHFILES, or the CalledProcessError of the objdump
+     that failed for it.  Each list is disassembled with a single objdump
+     call, and each pair diffed on its own so a hunk never spans two
+     files."""
+  # The dumps are removed with the directory on any exception.
+  with tempfile.TemporaryDirectory() as tmpdir:
+    try:
+      dumpsb = disassemble(objdump, basefiles, tmpdir)
+      dumpsp = disassemble(objdump, patchfiles, tmpdir)
+    except subprocess.CalledProcessError:
+      # Find out which pairs fail, so the others are still diffed.
+      results = []
+      for b, p in zip(basefiles, patchfiles):
+        try:
+          dumpb, = disassemble(objdump, [b], tmpdir)
+          dumpp, = disassemble(objdump, [p], tmpdir)
+          results.append(diff_dumps(b, p, dumpb, dumpp))
+        except subprocess.CalledProcessError as e:
+          results.append(e)
+      return results
+    return [diff_dumps(b, p, dumpb, dumpp) for b, p, dumpb, dumpp
+            in zip(basefiles, patchfiles, dumpsb, dumpsp)]
+
+# Maximum number of files passed to a single objdump call.
+OBJDUMP_MAX_FILES = 256
+
+# Maximum number of files passed to a single strip call.
+STRIP_MAX_FILES = 512
+
+def split_files(basefiles, patchfiles, njobs):
+  """Split the file pairs in up to NJOBS contiguous chunks (more if needed
+     to keep at most OBJDUMP_MAX_FILES files on each), returning a list of
+     (basefiles, patchfiles)."""
+  pairs = list(zip(basefiles, patchfiles))
+  size = min(OBJDUMP_MAX_FILES, max(1, -(-len(pairs) // njobs)))
+  chunks = []
+  for i in range(0, len(pairs), size):
+    chunk = pairs[i:i + size]
+    chunks.append(([b for b,p in chunk], [p for b,p in chunk]))
+  return chunks
 
 class Config(object):
   """A configuration for building a compiler and associated libraries."""
@@ -44,6 +144,8 @@ class Config(object):
     self.os = os_name
     self.name = '%s-%s' % (arch, os_name)
     self.triplet = '%s-glibc-%s' % (arch, os_name)
+    self.tool_prefix = '%s/%s/bin/%s-' % (PATHS["compilers"], self.name,
+                                          self.triplet)
     self.glibcs = [g["arch"] for g in glibcs]
 
 class Context(object):
@@ -118,55 +220,53 @@ class Context(object):
   def run(self, base, patched, strip, tofile, abis):
     if not abis:
       abis = sorted(self.configs.keys())
+    basefiles  = list(recursive_glob(base, "*.so"))
+    patchfiles = list(recursive_glob(patched, "*.so"))
     for c in abis:
-      basefiles  = recursive_glob(base, "*.so")
-      patchfiles = recursive_glob(patched, "*.so")
       if strip is True:
         self.run_strip (basefiles, patchfiles, self.configs[c], c)
       self.run_objdump_diff (basefiles, patchfiles, tofile, self.configs[c], c)
 
   def run_strip(self, basefiles, patchfiles, cfg, c):
-    strip = PATHS["compilers"] + "/" + cfg.name + "/bin/" + cfg.triplet + "-strip"
-    for b,p in zip(basefiles, patchfiles):
-      if subprocess.call([strip, b], shell=False) != 0:
-        print ("error: %s %s failed" % (strip, b))
-      if subprocess.call([strip, p], shell=False) != 0:
-        print ("error: %s %s failed" % (strip, p))
+    strip = cfg.tool_prefix + "strip"
+    # strip accepts multiple files, so avoid one call per file.  Only the
+    # paired files are compared, so leave the unpaired ones untouched.
+    files = list(chain.from_iterable(zip(basefiles, patchfiles)))
+    for i in range(0, len(files), STRIP_MAX_FILES):
+      chunk = files[i:i + STRIP_MAX_FILES]
+      ret = subprocess.call([strip] + chunk, shell=False, close_fds=False)
+      if ret != 0:
+        print ("error: %s failed with status %d for chunk %d"
+               % (strip, ret, i // STRIP_MAX_FILES))
     print("info: strip %s done" % (c))
 
   def run_objdump_diff(self, basefiles, patchfiles, tofile, cfg, c):
-    objdump = PATHS["compilers"] + "/" + cfg.name + "/bin/" + cfg.triplet + "-objdump"
-      
+    objdump = cfg.tool_prefix + "objdump"
+
     mode = None
-    for b,p in zip(basefiles, patchfiles):
-      try:
-        tmpb = tempfile.NamedTemporaryFile(delete=False)
-        outb = subprocess.check_output([objdump, "-d", b])
-        tmpb.write(outb)
-
-        tmpp = tempfile.NamedTemporaryFile(delete=False)
-        outp = subprocess.check_output([objdump, "-d", p])
-        tmpp.write(outp)
-
-        diffp = subprocess.Popen(["diff", "-u", tmpb.name, tmpp.name],
-                                 stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        diff, err = diffp.communicate()
-        if tofile is True:
-          if mode is None:
-            mode = "wb"
+    with concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count()) \
+         as executor:
+      futures = [executor.submit(diff_files, objdump, b, p)
+                 for b,p in split_files(basefiles, patchfiles,
+                                        os.cpu_count())]
+      # Write the results in the submission order.
+      for future in futures:
+        for diff in future.result():
+          if isinstance(diff, subprocess.CalledProcessError):
+            print ("error: %s failed" % (diff.cmd))
+            continue
+          if tofile is True:
+            if mode is None:
+              mode = "wb"
+            else:
+              mode = "ab"
+            f = open (c + ".out", mode)
+            f.write(diff)
+            f.close()
           else:
-            mode = "ab"
-          f = open (c + ".out", mode)
-          f.write(diff)
-          f.close()
-        else:
-          sys.stdout.buffer.write(diff)
-        tmpb.close()
-        tmpb.close()
-      except subprocess.CalledProcessError as e:
-        print ("error: %s failed" % (e.cmd))
+            sys.stdout.buffer.write(diff)
     print("info: diff %s done" % (c))
-    
+
 
 def get_parser():
   parser = argparse.ArgumentParser(description=__doc__)
@@ -196,10 +296,10 @@ SPECIAL_LISTS = {
 }
 
 def main(argv):
-  read_config ()
-
   parser = get_parser()
   opts = parser.parse_args(argv)
+
+  read_config ()
   ctx = Context()
   configs = list(chain.from_iterable(SPECIAL_LISTS.get(c, [c]) for c in opts.configs))
 
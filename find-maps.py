@@ -2,35 +2,53 @@
 
 import sys
 import argparse
+import re
+import bisect
 
 """
-find-maps.py is a script to find the memory map of the given address from
+find-maps.py is a script to find the memory map of the given addresses from
 a specified pid.
 """
 
-def find_map(pid, address):
+MAPS_LINE = re.compile(r'^([0-9a-f]+)-([0-9a-f]+) .*$', re.MULTILINE)
+
+def read_maps(pid):
+  """Return the start addresses, end addresses, and lines of the memory
+     map of PID, sorted by start address as the kernel reports them."""
   with open ("/proc/" + str (pid) + "/maps", "r") as f:
-    for line in f:
-      line = line.replace('\n', '')
-      fields = line.split()
-      ran = fields[0].split('-')
-      start = int (ran[0], 16)
-      end = int (ran[1], 16)
-      if address >= start and address < end:
-        print (" => " + line)
-      else:
-        print ("    " + line)
+    maps = f.read()
+  starts = []
+  ends = []
+  lines = []
+  for m in MAPS_LINE.finditer(maps):
+    starts.append(int (m.group(1), 16))
+    ends.append(int (m.group(2), 16))
+    lines.append(m.group(0))
+  return starts, ends, lines
+
+def find_map(pid, addresses):
+  starts, ends, lines = read_maps(pid)
+  found = set()
+  for address in addresses:
+    idx = bisect.bisect_right(starts, address) - 1
+    if idx >= 0 and address < ends[idx]:
+      found.add(idx)
+  # The whole map is shown, with the matching entries marked.
+  out = [(" => " if i in found else "    ") + line
+         for i, line in enumerate(lines)]
+  sys.stdout.write("\n".join(out) + "\n")
+
+def auto_int(x):
+  return int(x, 0)
 
 def get_parser ():
-  def auto_int(x):
-     return int(x, 0)
   parser = argparse.ArgumentParser(description=__doc__)
   parser.add_argument('pid',
                       help='The process id',
                       type=int)
   parser.add_argument('address',
-                      help='The memory address',
-                      type=auto_int)
+                      help='The memory addresses',
+                      type=auto_int, nargs='+')
   return parser
 
 def main (argv):
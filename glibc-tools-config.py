@@ -1,6 +1,7 @@
 #! /usr/bin/env python3
 
 import sys
+import os
 import argparse
 import configparser
 from py3compat import *
@@ -37,7 +38,7 @@ def main(argv):
   cfg.set('glibc-tools', 'logsdir', opts.logsdir)
   cfg.set('glibc-tools', 'compilers', opts.compilers)
 
-  cfgpath = str(Path.home()) + "/.glibc-tools.ini"
+  cfgpath = os.path.expanduser("~/.glibc-tools.ini")
   with open(cfgpath, 'w') as cfgfile:
     cfg.write(cfgfile)
 
@@ -6,8 +6,12 @@ import shutil
 import argparse
 import subprocess
 import platform
+import shlex
+import time
 from itertools import chain
 import configparser
+import functools
+import hashlib
 from py3compat import *
 from collections import OrderedDict
 import concurrent.futures
@@ -31,9 +35,10 @@ ACTIONS = (
   'bench-build',
   'list')
 
-def read_config(gccversion, srcdir, suffix):
+@functools.lru_cache(maxsize=None)
+def load_config():
   config = configparser.RawConfigParser()
-  cfgpath = str(Path.home()) + "/.glibc-tools.ini"
+  cfgpath = os.path.expanduser("~/.glibc-tools.ini")
   config.read(cfgpath)
   if 'glibc-tools' not in config.sections() \
      or 'srcdir' not in config['glibc-tools'] \
@@ -42,8 +47,11 @@ def read_config(gccversion, srcdir, suffix):
      or 'compilers' not in config['glibc-tools']:
     print("error: config invalid, run glibc-tools-config.py")
     sys.exit(1)
+  return dict(config['glibc-tools'])
+
+def read_config(gccversion, srcdir, suffix):
   global PATHS, SUFFIX
-  PATHS = config._sections['glibc-tools']
+  PATHS = dict(load_config())
   PATHS['gccversion'] = "{0}{1}".format("-gcc" if gccversion else "", gccversion)
   PATHS['compilers'] = PATHS['compilers'] + gccversion
   if srcdir:
@@ -56,6 +64,14 @@ def remove_dirs(*args):
   for dir in args:
     shutil.rmtree(dir, ignore_errors=True)
 
+def remove_files(*args):
+  """Remove files if they exist."""
+  for f in args:
+    try:
+      os.remove(f)
+    except FileNotFoundError:
+      pass
+
 def remove_recreate_dirs(*args):
   """Remove directories if they exist, and create them as empty."""
   remove_dirs(*args)
@@ -63,20 +79,99 @@ def remove_recreate_dirs(*args):
     os.makedirs(dir, exist_ok=True)
 
 def create_file(filename):
-  os.makedirs(os.path.dirname(filename), exist_ok=True)
-  return open(filename, "w");
+  # The file is only used as a child output, so there is no need for
+  # python text or buffering layers.
+  return open(filename, "wb", buffering=0);
 
 def build_dir(abi):
   return PATHS['builddir'] + '/' + abi + PATHS['gccversion'] + SUFFIX
 
+# Cache files not updated by configure for this long are removed.
+CONFIG_CACHE_MAX_AGE = 30 * 24 * 60 * 60
+
+def config_cache_dir():
+  return os.path.join(PATHS['builddir'], 'config-cache')
+
+def prune_config_cache():
+  """Remove the cache files of option sets not configured recently, since
+     each change in the configure command creates a new file."""
+  limit = time.time() - CONFIG_CACHE_MAX_AGE
+  try:
+    entries = list(os.scandir(config_cache_dir()))
+  except OSError:
+    return
+  for entry in entries:
+    try:
+      if entry.stat().st_mtime < limit:
+        os.remove(entry.path)
+    except OSError:
+      pass
+
+# The autoconf precious variables, configure refuses a cache created with
+# a different value of any of them in the environment.
+CONFIG_CACHE_ENV = ('CC', 'CFLAGS', 'CPPFLAGS', 'LDFLAGS', 'LIBS', 'CPP',
+                    'CXX', 'CXXFLAGS', 'CCC')
+
+def mtime_ns(path):
+  try:
+    return os.stat(path).st_mtime_ns
+  except OSError:
+    return 0
+
+def config_cache_file(abi, cmd, compiler):
+  """Return the autoconf cache file for ABI configured with CMD.  The
+     cache is kept outside the build directory, so it survives a clean
+     build, and keyed by the configure command and the precious variables
+     of the environment since autoconf refuses a cache created with
+     different compiler or flags.  The COMPILER and configure script
+     modification times are also used, so a rebuilt toolchain or updated
+     sources are probed again."""
+  key = [" ".join(cmd)]
+  key += ["%s=%s" % (v, os.environ[v]) for v in CONFIG_CACHE_ENV
+          if v in os.environ]
+  key += [str(mtime_ns(f)) for f in (compiler,
+                                     PATHS['srcdir'] + '/configure',
+                                     PATHS['srcdir'] + '/configure.ac')]
+  key = hashlib.sha1("\n".join(key).encode("utf-8")).hexdigest()[:16]
+  return os.path.join(config_cache_dir(),
+                      '%s%s%s-%s.cache' % (abi, PATHS['gccversion'], SUFFIX,
+                                           key))
+
+def prepare_config_cache(path):
+  """Create the directory of the autoconf cache file PATH.  An existing
+     cache is also marked as used for prune_config_cache, since autoconf
+     only rewrites it when its contents change."""
+  os.makedirs(os.path.dirname(path), exist_ok=True)
+  try:
+    os.utime(path)
+  except FileNotFoundError:
+    pass
+
 PLATFORM_MAP = { "ppc64le" : "powerpc64le" };
 
+@functools.lru_cache(maxsize=1)
 def build_triplet():
   platstr = platform.machine()
   if platstr in PLATFORM_MAP:
     platstr = PLATFORM_MAP[platstr];
   return platstr + "-linux-gnu"
 
+@functools.lru_cache(maxsize=None)
+def library_dirs(gcc):
+  """Return the library search directories of the GCC command line, the
+     same ones used by -print-file-name, so all the libraries can be found
+     with a single compiler run."""
+  try:
+    ret = subprocess.run(shlex.split(gcc) + ['-print-search-dirs'],
+                         stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                         universal_newlines=True, close_fds=False)
+  except OSError:
+    return []
+  for line in ret.stdout.splitlines():
+    if line.startswith('libraries: '):
+      return line[len('libraries: '):].lstrip('=').split(':')
+  return []
+
 class Config(object):
   """A configuration for building a compiler and associated libraries."""
 
@@ -91,7 +186,11 @@ class Config(object):
       self.name = '%s-%s' % (arch, os_name)
     else:
       self.name = '%s-%s-%s' % (arch, os_name, variant)
+    # The names are used as the configs keys.
+    self.name = sys.intern(self.name)
     self.triplet = '%s-glibc-%s' % (arch, os_name)
+    self.tool_prefix = '%s/%s/bin/%s-' % (PATHS["compilers"], self.name,
+                                          self.triplet)
     if glibcs is None:
       glibcs = [{'variant': variant}]
     if extra_glibcs is None:
@@ -119,19 +218,300 @@ def create_outfile(strtype, abi, action, suffix):
     filename += '-' + SUFFIX
   return create_file(filename + '_' + action + suffix)
 
-def run_cmd(abi, action, cmd):
+@functools.lru_cache(maxsize=1)
+def ccache():
+  """Return the ccache path, or None if it is not installed."""
+  return shutil.which('ccache')
+
+def ccache_basedir():
+  """Return the ccache base directory, which covers both the sources and
+     the build so the cache is shared between checkouts at the same depth.
+     ccache also rewrites the system and sysroot header paths below the
+     base directory, so the build directory alone is used if the common
+     path is the root or a parent of the home directory."""
+  builddir = os.path.abspath(PATHS['builddir'])
+  basedir = os.path.commonpath([os.path.abspath(PATHS['srcdir']), builddir])
+  home = os.path.expanduser("~")
+  if basedir == os.sep or home.startswith(basedir.rstrip(os.sep) + os.sep):
+    return builddir
+  return basedir
+
+@functools.lru_cache(maxsize=1)
+def build_env(use_ccache):
+  """Return the environment used for the build commands, with the ccache
+     settings if USE_CCACHE."""
+  env = dict(os.environ)
+  if use_ccache:
+    # The compilers are rebuilt in place, so check their contents instead
+    # of the mtime.
+    env.setdefault('CCACHE_BASEDIR', ccache_basedir())
+    env.setdefault('CCACHE_COMPILERCHECK', 'content')
+  return env
+
+def run_cmd(abi, action, cmd, env):
   builddir = build_dir (abi)
-  outfile = create_outfile('logsdir', abi, action, '.out')
-  errfile = create_outfile('logsdir', abi, action, '.err')
-  proc = subprocess.Popen(cmd, cwd=builddir, stdout=outfile, stderr=errfile)
-  proc.wait()
+  with create_outfile('logsdir', abi, action, '.out') as outfile, \
+       create_outfile('logsdir', abi, action, '.err') as errfile:
+    # Python opens files as non-inheritable, so there is no need to close
+    # the descriptors in the child (and subprocess uses vfork already).
+    proc = subprocess.Popen(cmd, cwd=builddir, stdout=outfile, stderr=errfile,
+                            env=env, close_fds=False)
+    proc.wait()
   return proc.returncode
 
 
+def power_variants(cpus, disable_multi_arch_cpus):
+  """Return the glibc variants built for each of the POWER CPUS, and the
+     ones built with multi-arch disabled for DISABLE_MULTI_ARCH_CPUS."""
+  variants = [{'variant': cpu, 'ccopts': '-mcpu=%s' % cpu,
+               'cfg' : ["--with-cpu=%s" % cpu]} for cpu in cpus]
+  variants += [{'variant': '%s-disable-multi-arch' % cpu,
+                'ccopts': '-mcpu=%s' % cpu,
+                'cfg' : ["--with-cpu=%s" % cpu, "--disable-multi-arch"]}
+               for cpu in disable_multi_arch_cpus]
+  return variants
+
+# All known glibc build configurations.
+CONFIGS = [
+  dict(arch='aarch64',
+       os_name='linux-gnu',
+       glibcs=[{'cfg' : ['--enable-memory-tagging']},
+               {'variant': 'disable-multi-arch',
+                'cfg' : ["--disable-multi-arch"]}]),
+  dict(arch='aarch64_be',
+       os_name='linux-gnu'),
+  dict(arch='arc',
+       os_name='linux-gnu'),
+  dict(arch='arc',
+       os_name='linux-gnuhf'),
+  dict(arch='arceb',
+       os_name='linux-gnu'),
+  dict(arch='alpha',
+       os_name='linux-gnu',
+       glibcs=[{},
+               {'variant': 'ev6', 'ccopts': '-mcpu=ev6'},
+               {'variant': 'ev67', 'ccopts': '-mcpu=ev67'}]),
+  dict(arch='arm',
+       os_name='linux-gnueabi',
+       glibcs=[{},
+               {'arch' : 'armv7a', 'ccopts': '-march=armv7-a'}]),
+  dict(arch='arm',
+       os_name='linux-gnueabihf',
+       glibcs=[{},
+               {'arch' : 'armv5',
+                'ccopts': '-march=armv5te -mfpu=vfpv3'},
+               {'arch' : 'armv6',
+                'ccopts': '-march=armv6 -mfpu=vfpv3'},
+               {'arch' : 'armv6t2',
+                'ccopts': '-march=armv6t2 -mfpu=vfpv3'},
+               {'arch' : 'armv7a',
+                'ccopts': '-march=armv7-a -mfpu=vfpv3'},
+               {'arch' : 'armv7a',
+                'ccopts': '-march=armv7-a -mfpu=vfpv3',
+                'variant' : 'disable-multi-arch',
+                'cfg'  : ["--disable-multi-arch"]},
+               {'arch' : 'armv7a-thumb',
+                'ccopts': '-march=armv7-a -mfpu=vfpv3 -mthumb'},
+               {'arch' : 'armv7a-neon',
+                'ccopts': '-march=armv7-a -mfpu=neon'},
+               {'arch' : 'armv7a-neonhard',
+                'ccopts': '-march=armv7-a -mfpu=neon -mfloat-abi=hard'},
+               {'arch' : 'armv8a',
+                'ccopts': '-march=armv8-a -mfpu=neon'},
+               {'arch' : 'armv9a',
+                'ccopts': '-march=armv9-a -mfpu=neon'}]),
+  dict(arch='armeb',
+       os_name='linux-gnueabihf',
+       glibcs=[{},
+               {'arch' : 'armeb-v5',
+                'ccopts': '-march=armv5te -mfpu=vfpv3'},
+               {'arch' : 'armeb-v6',
+                'ccopts': '-march=armv6 -mfpu=vfpv3'},
+               {'arch' : 'armeb-v6t2',
+                'ccopts': '-march=armv6t2 -mfpu=vfpv3'},
+               {'arch' : 'armeb-v7a',
+                'ccopts': '-march=armv7-a -mfpu=vfpv3'},
+               {'arch' : 'armeb-v7a',
+                'ccopts': '-march=armv7-a -mfpu=vfpv3',
+                'variant' : 'disable-multi-arch',
+                'cfg'  : ["--disable-multi-arch"]},
+               {'arch' : 'armeb-v7a-neon',
+                'ccopts': '-march=armv7-a -mfpu=neon'},
+               {'arch' : 'armeb-v7neonhard',
+                'ccopts': '-march=armv7-a -mfpu=neon -mfloat-abi=hard'}]),
+  dict(arch='hppa',
+       os_name='linux-gnu'),
+  dict(arch='ia64',
+       os_name='linux-gnu'),
+  dict(arch='i686',
+       os_name='gnu'),
+  dict(arch='m68k',
+       os_name='linux-gnu',
+       glibcs=[{},
+               {'variant': 'm68030', 'ccopts': '-mcpu=68030'},
+               {'variant': 'm68040', 'ccopts': '-mcpu=68040'},
+               {'variant': 'm68060', 'ccopts': '-mcpu=68060'}]),
+  dict(arch='m68k',
+       os_name='linux-gnu',
+       variant='coldfire'),
+  dict(arch='loongarch64',
+       os_name='linux-gnu',
+       variant='lp64d'),
+  dict(arch='loongarch64',
+       os_name='linux-gnu',
+       variant='lp64s'),
+  dict(arch='microblaze',
+       os_name='linux-gnu'),
+  dict(arch='microblazeel',
+       os_name='linux-gnu'),
+  dict(arch='mips64',
+       os_name='linux-gnu',
+       glibcs=[{'arch': 'mips64-n32'},
+               {'arch': 'mips',
+                'ccopts': '-mabi=32'},
+               {'arch': 'mips',
+                'variant' : 'mips16',
+                'ccopts': '-mabi=32 -mips16'},
+               {'arch': 'mips64',
+                'ccopts': '-mabi=64'}]),
+  dict(arch='mips64',
+       os_name='linux-gnu',
+       variant='soft',
+       glibcs=[{'arch': 'mips', 'variant' : 'soft',
+                'ccopts': '-mabi=32'}]),
+  dict(arch='mips64el',
+       os_name='linux-gnu',
+       glibcs=[{'arch': 'mips64el-n32'},
+               {'arch': 'mipsel',
+                'ccopts': '-mabi=32'},
+               {'arch': 'mips64el',
+                'ccopts': '-mabi=64'}]),
+  dict(arch='nios2',
+       os_name='linux-gnu'),
+  dict(arch='or1k',
+       os_name='linux-gnu',
+       glibcs=[{'variant': 'soft'},
+               {'variant': 'hard',  'ccopts': '-mhard-float'}]),
+  dict(arch='powerpc',
+       os_name='linux-gnu',
+       variant='soft'),
+  dict(arch='powerpc',
+       os_name='linux-gnu',
+       glibcs=[{}] + power_variants(
+         ('power4', 'power5', 'power5+', 'power6', 'power6x', 'power7',
+          'power8', 'power9', 'power10'),
+         ('power4', 'power5', 'power5+', 'power6', 'power6x', 'power7',
+          'power8'))),
+  dict(arch='powerpc64',
+       os_name='linux-gnu',
+       glibcs=[{}] + power_variants(
+         ('power4', 'power5', 'power5+', 'power6', 'power6x', 'power7',
+          'power8'),
+         ('power4', 'power5', 'power5+', 'power6', 'power6x', 'power7',
+          'power8'))
+       + [{'variant': 'disable-multi-arch', 'cfg' : ["--disable-multi-arch"]}]),
+  dict(arch='powerpc64le',
+       os_name='linux-gnu',
+       glibcs=[{}] + power_variants(
+         ('power8', 'power9', 'power10'),
+         ('power8', 'power9', 'power10'))
+       # power8 is the minimum little-endian cpu glibc supports, so this
+       # variant only builds the code with -mcpu=power7.
+       + [{'variant': 'power7-disable-multi-arch', 'ccopts': '-mcpu=power7',
+           'cfg' : ["--with-cpu=power8", "--disable-multi-arch"]},
+          {'variant': 'disable-multi-arch', 'cfg' : ["--disable-multi-arch"]}]),
+  dict(arch='riscv32',
+       os_name='linux-gnu',
+       variant='rv32imac-ilp32'),
+  dict(arch='riscv32',
+       os_name='linux-gnu',
+       variant='rv32imafdc-ilp32'),
+  dict(arch='riscv32',
+       os_name='linux-gnu',
+       variant='rv32imafdc-ilp32d'),
+  dict(arch='riscv64',
+       os_name='linux-gnu',
+       variant='rv64imac-lp64'),
+  dict(arch='riscv64',
+       os_name='linux-gnu',
+       variant='rv64imafdc-lp64'),
+  dict(arch='riscv64',
+       os_name='linux-gnu',
+       variant='rv64imafdc-lp64d'),
+  dict(arch='s390x',
+       os_name='linux-gnu',
+       glibcs=[{},
+               {'variant' : 'disable-multi-arch', 'cfg' : ['--disable-multi-arch']},
+               {'variant': 'z900', 'ccopts': '-march=z900'}, # arch5
+               {'variant': 'z10', 'ccopts': '-march=z10'},   # arch8
+               {'variant': 'z196', 'ccopts': '-march=z196'}, # arch9
+               {'variant': 'z13', 'ccopts': '-march=z13'},   # arch?
+               {'arch'   : 's390', 'ccopts': '-m31'},
+               {'arch'   : 's390', 'variant' : 'disable-multi-arch', 'cfg' : ['--disable-multi-arch'], 'ccopts' : '-m31'}]),
+  dict(arch='csky',
+       os_name='linux-gnuabiv2',
+       variant='soft'),
+  dict(arch='csky',
+       os_name='linux-gnuabiv2'),
+  dict(arch='sh3',
+       os_name='linux-gnu'),
+  dict(arch='sh3eb',
+       os_name='linux-gnu'),
+  dict(arch='sh4',
+       os_name='linux-gnu'),
+  dict(arch='sh4eb',
+       os_name='linux-gnu'),
+  dict(arch='sh4',
+       os_name='linux-gnu',
+       variant='soft'),
+  dict(arch='sh4eb',
+       os_name='linux-gnu',
+       variant='soft'),
+  dict(arch='sparc64',
+       os_name='linux-gnu',
+       glibcs=[{'ccopts' : "-mcpu=niagara"},
+               {'arch': 'sparc',
+                'ccopts': '-m32 -mlong-double-128 -mcpu=leon3'},
+               {'arch': 'sparcv8',
+                'ccopts': '-m32 -mlong-double-128 -mcpu=leon3'},
+               {'arch': 'sparcv9',
+                'ccopts': '-m32 -mlong-double-128 -mcpu=v9'}],
+       extra_glibcs=[{'variant': 'disable-multi-arch',
+                      'cfg': ['--disable-multi-arch']},
+                     {'variant': 'disable-multi-arch',
+                      'arch': 'sparcv9',
+                      'ccopts': '-m32 -mlong-double-128 -mcpu=v9',
+                      'cfg': ['--disable-multi-arch']}]),
+  dict(arch='x86_64',
+       os_name='gnu'),
+  dict(arch='x86_64',
+       os_name='linux-gnu',
+       glibcs=[{'cfg': ['--enable-cet']},
+               {'variant': 'x32', 'ccopts': '-mx32'},
+               {'arch': 'i686', 'ccopts': '-m32 -march=i686'},
+               {'variant': 'v2', 'ccopts' : '-march=x86-64-v2'},
+               {'variant': 'v3', 'ccopts' : '-march=x86-64-v3'},
+               {'variant': 'v4', 'ccopts' : '-march=x86-64-v4'}],
+       extra_glibcs=[{'variant': 'disable-multi-arch',
+                      'cfg': ['--disable-multi-arch']},
+                     {'variant': 'disable-multi-arch',
+                      'arch': 'i686',
+                      'ccopts': '-m32 -march=i686',
+                      'cfg': ['--disable-multi-arch']},
+                     {'arch': 'i486',
+                      'ccopts': '-m32 -march=i486'},
+                     {'arch': 'i586',
+                      'ccopts': '-m32 -march=i586'},
+                     {'variant': 'fp',
+                      'arch': 'i686',
+                      'ccopts': '-m32 -march=i686 -fno-omit-frame-pointer'}]),
+]
+
 class Context(object):
   def __init__ (self, opts):
     self.parallelize = opts.parallelize[0]
     self.build_jobs = opts.parallelize[1]
+    self.make_jobs = '-j%d' % (self.build_jobs)
 
     self.run_built_tests = 'yes' if opts.run_built_tests else 'no'
 
@@ -157,7 +537,11 @@ class Context(object):
       self.extra_config_opts.append("CXXFLAGS={}".format(opts.cflags))
 
 
+    self.config_cache = opts.config_cache
+    self.ccache = ccache() if opts.ccache else None
     self.keep = opts.keep
+    self.keep_going = opts.keep_going
+    self.dry_run = opts.dry_run
     self.status_log_list = []
     self.glibc_configs = {}
     self.configs = {}
@@ -173,9 +557,11 @@ class Context(object):
     ("make",
       (lambda self, abi : self.glibc_configs[abi].build(),
        ["configure", "copylibs", "make"])),
+    # make check already builds glibc, there is no need to issue a
+    # separate make.
     ("check",
       (lambda self, abi : self.glibc_configs[abi].check(),
-       ["configure", "copylibs", "make", "check"])),
+       ["configure", "copylibs", "check"])),
     ("check-abi",
       (lambda self, abi : self.glibc_configs[abi].check_abi(),
        ["configure", "make", "check-abi"])),
@@ -187,48 +573,151 @@ class Context(object):
        ["configure", "make", "bench-build"])),
   ])
 
+  # Files created by an action, used to check if it is up to date.  make
+  # links libc.so before the rest of the build, so an interrupted or failed
+  # make is only caught by a stamp written once it succeeds.
+  ACTION_OUTPUTS = {
+    "configure" : "config.status",
+    "make"      : ".glibc-tools-make",
+  }
+
+  def source_mtime(self):
+    """Return the newest modification time of the glibc sources."""
+    mtime = 0
+    for root, dirnames, filenames in os.walk(PATHS["srcdir"]):
+      dirnames[:] = [d for d in dirnames if d != '.git']
+      for f in filenames:
+        try:
+          mtime = max(mtime, os.stat(os.path.join(root, f)).st_mtime)
+        except OSError:
+          pass
+    return mtime
+
+  # The configure command line used for the build directory, so a
+  # change of options is not hidden by an existing config.status.
+  CONFIGURE_STAMP = ".glibc-tools-configure"
+
+  def configure_stamp(self, abi):
+    return os.path.join(build_dir(abi), self.CONFIGURE_STAMP)
+
+  def make_stamp(self, abi):
+    return os.path.join(build_dir(abi), self.ACTION_OUTPUTS["make"])
+
+  def up_to_date(self, abi, action, cmd, srcmtime):
+    """Return whether ACTION output for ABI is newer than the sources, or
+       for configure whether the tree was configured with CMD."""
+    if action not in self.ACTION_OUTPUTS:
+      return False
+    output = os.path.join(build_dir(abi), self.ACTION_OUTPUTS[action])
+    try:
+      mtime = os.stat(output).st_mtime
+    except OSError:
+      return False
+    # The glibc makefiles rerun config.status when configure changes, so
+    # a configured tree does not depend on the sources mtime.
+    if action == "configure":
+      try:
+        with open(self.configure_stamp(abi)) as f:
+          return f.read() == "\n".join(cmd)
+      except OSError:
+        return False
+    return mtime >= srcmtime
+
   def run(self, opts, glibcs):
     if not glibcs:
       glibcs = sorted(self.glibc_configs.keys())
 
+    unknown = [abi for abi in glibcs if abi not in self.glibc_configs]
+    if unknown:
+      print('error: unknown glibc config %s' % ', '.join(unknown))
+      exit(1)
+
     action = opts.action
     if action == "list":
       return self.list_configs(glibcs)
 
-    cmds = OrderedDict((action, OrderedDict()) for action in ACTIONS)
-
-    cmd = self.CMD_MAP[action]
-    for abi in glibcs:
-      for act in cmd[1]:
-        cmds[act][abi] = self.CMD_MAP[act][0](self, abi)
-
-      if self.keep is False:
+    # The actions to run for each abi, in the ACTIONS order.
+    deps = self.CMD_MAP[action][1]
+    acts = [act for act in ACTIONS if act in deps]
+
+    # With -k the dependent actions already done are skipped, the requested
+    # action is always run.  Walking the sources is only required to check
+    # the make output.
+    srcmtime = None
+    if self.keep is True:
+      srcmtime = 0
+      if action != "make" and "make" in deps:
+        srcmtime = self.source_mtime()
+
+    def abiname(opts, abi):
+       return '{}{}{}'.format(abi,
+                              '-gcc{}'.format(opts.gccversion) if opts.gccversion else '',
+                              '-{}'.format(opts.suffix) if opts.suffix else '')
+
+    # The environment set for the build commands, shown with --dry-run.
+    env = build_env(self.ccache is not None)
+    envdelta = ['%s=%s' % (k, v) for k, v in sorted(env.items())
+                if os.environ.get(k) != v]
+
+    # Each abi runs its actions in sequence, so a slow configure does not
+    # stall the build of the other abis.  Unless --keep-going is used, an
+    # abi stops at the first failed action.
+    def run_abi(abi):
+      name = abiname(opts, abi)
+      # Cleaning up a large build directory is slow, so do it along with
+      # the other abis builds.
+      if self.keep is False and self.dry_run is False:
         remove_recreate_dirs(build_dir (abi))
-
+      for act in acts:
+        try:
+          # The commands are built here, so the compiler queries done by
+          # copylibs run in parallel for all the abis.
+          cmd = self.CMD_MAP[act][0](self, abi)
+          if srcmtime is not None and act != action \
+             and self.up_to_date(abi, act, cmd, srcmtime):
+            print (bcolors.OKCYAN + "SKIP : " + bcolors.ENDC +
+                   "%s | %s" % (act, name))
+            continue
+          if self.dry_run is True:
+            print ("%s | %s: %s" % (act, name,
+                                    " ".join(shlex.quote(c)
+                                             for c in envdelta + cmd)))
+            continue
+          # A new configuration also requires a new build.
+          if act == "configure":
+            remove_files(self.configure_stamp(abi), self.make_stamp(abi))
+            cache = self.glibc_configs[abi].config_cache_path
+            if cache is not None:
+              prepare_config_cache(cache)
+          elif act == "make":
+            remove_files(self.make_stamp(abi))
+          resultcode = run_cmd(abi, act, cmd, env)
+          if act == "configure" and resultcode == 0:
+            with open(self.configure_stamp(abi), "w") as f:
+              f.write("\n".join(cmd))
+          elif act == "make" and resultcode == 0:
+            open(self.make_stamp(abi), "w").close()
+        except Exception as exc:
+          print('%r generated an exception: %s' % (name, exc))
+          resultcode = None
+        else:
+          msg = "%s | %s" % (act, name)
+          if resultcode == 0:
+            print (bcolors.OKBLUE + "PASS : " + bcolors.ENDC + msg)
+          else:
+            print (bcolors.FAIL + "FAIL : " + bcolors.ENDC + msg)
+        if resultcode != 0 and self.keep_going is False:
+          return
+
+    if self.dry_run is False:
+      os.makedirs(PATHS['logsdir'], exist_ok=True)
+      if self.config_cache and "configure" in deps:
+        prune_config_cache()
     with concurrent.futures.ThreadPoolExecutor(max_workers=self.parallelize) \
          as executor:
-      for action, cmds in cmds.items():
-        if len(cmds) == 0:
-          continue
-
-        def abiname(opts, abi):
-           return '{}{}{}'.format(abi,
-                                  '-gcc{}'.format(opts.gccversion) if opts.gccversion else '',
-                                  '-{}'.format(opts.suffix) if opts.suffix else '')
-        future_to_abi = {executor.submit(run_cmd, abi, action, cmds[abi]) : \
-                         abiname(opts, abi) for abi in cmds.keys()}
-        for future in concurrent.futures.as_completed(future_to_abi):
-          abi = future_to_abi[future]
-          try:
-            resultcode = future.result()
-          except Exception as exc:
-            print('%r generated an exception: %s' % (abi, exc))
-          else:
-            msg = "%s | %s" % (action, abi)
-            if resultcode == 0:
-              print (bcolors.OKBLUE + "PASS : " + bcolors.ENDC + msg)
-            else:
-              print (bcolors.FAIL + "FAIL : " + bcolors.ENDC + msg)
+      for future in concurrent.futures.as_completed(
+          [executor.submit(run_abi, abi) for abi in glibcs]):
+        future.result()
 
 
   def add_config(self, **args):
@@ -247,261 +736,8 @@ class Context(object):
 
   def add_all_configs(self):
     """Add all known glibc build configurations."""
-    self.add_config(arch='aarch64',
-                    os_name='linux-gnu',
-                    glibcs=[{'cfg' : ['--enable-memory-tagging']},
-                            {'variant': 'disable-multi-arch',
-                             'cfg' : ["--disable-multi-arch"]}])
-    self.add_config(arch='aarch64_be',
-                    os_name='linux-gnu')
-    self.add_config(arch='arc',
-                    os_name='linux-gnu')
-    self.add_config(arch='arc',
-                    os_name='linux-gnuhf')
-    self.add_config(arch='arceb',
-                    os_name='linux-gnu')
-    self.add_config(arch='alpha',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant': 'ev6', 'ccopts': '-mcpu=ev6'},
-                            {'variant': 'ev67', 'ccopts': '-mcpu=ev67'}])
-    self.add_config(arch='arm',
-                    os_name='linux-gnueabi',
-                    glibcs=[{},
-                            {'arch' : 'armv7a', 'ccopts': '-march=armv7-a'}])
-    self.add_config(arch='arm',
-                    os_name='linux-gnueabihf',
-                    glibcs=[{},
-                            {'arch' : 'armv5',
-                             'ccopts': '-march=armv5te -mfpu=vfpv3'},
-                            {'arch' : 'armv6',
-                             'ccopts': '-march=armv6 -mfpu=vfpv3'},
-                            {'arch' : 'armv6t2',
-                             'ccopts': '-march=armv6t2 -mfpu=vfpv3'},
-                            {'arch' : 'armv7a',
-                             'ccopts': '-march=armv7-a -mfpu=vfpv3'},
-                            {'arch' : 'armv7a',
-                             'ccopts': '-march=armv7-a -mfpu=vfpv3',
-                             'variant' : 'disable-multi-arch',
-                             'cfg'  : ["--disable-multi-arch"]},
-                            {'arch' : 'armv7a-thumb',
-                             'ccopts': '-march=armv7-a -mfpu=vfpv3 -mthumb'},
-                            {'arch' : 'armv7a-neon',
-                             'ccopts': '-march=armv7-a -mfpu=neon'},
-                            {'arch' : 'armv7a-neonhard',
-                             'ccopts': '-march=armv7-a -mfpu=neon -mfloat-abi=hard'},
-                            {'arch' : 'armv8a',
-                             'ccopts': '-march=armv8-a -mfpu=neon'},
-                            {'arch' : 'armv9a',
-                             'ccopts': '-march=armv9-a -mfpu=neon'}])
-    self.add_config(arch='armeb',
-                    os_name='linux-gnueabihf',
-                    glibcs=[{},
-                            {'arch' : 'armeb-v5',
-                             'ccopts': '-march=armv5te -mfpu=vfpv3'},
-                            {'arch' : 'armeb-v6',
-                             'ccopts': '-march=armv6 -mfpu=vfpv3'},
-                            {'arch' : 'armeb-v6t2',
-                             'ccopts': '-march=armv6t2 -mfpu=vfpv3'},
-                            {'arch' : 'armeb-v7a',
-                             'ccopts': '-march=armv7-a -mfpu=vfpv3'},
-                            {'arch' : 'armeb-v7a',
-                             'ccopts': '-march=armv7-a -mfpu=vfpv3',
-                             'variant' : 'disable-multi-arch',
-                             'cfg'  : ["--disable-multi-arch"]},
-                            {'arch' : 'armeb-v7a-neon',
-                             'ccopts': '-march=armv7-a -mfpu=neon'},
-                            {'arch' : 'armeb-v7neonhard',
-                             'ccopts': '-march=armv7-a -mfpu=neon -mfloat-abi=hard'}])
-    self.add_config(arch='hppa',
-                    os_name='linux-gnu')
-    self.add_config(arch='ia64',
-                    os_name='linux-gnu')
-    self.add_config(arch='i686',
-                    os_name='gnu')
-    self.add_config(arch='m68k',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant': 'm68030', 'ccopts': '-mcpu=68030'},
-                            {'variant': 'm68040', 'ccopts': '-mcpu=68040'},
-                            {'variant': 'm68060', 'ccopts': '-mcpu=68060'}])
-    self.add_config(arch='m68k',
-                    os_name='linux-gnu',
-                    variant='coldfire')
-    self.add_config(arch='loongarch64',
-                    os_name='linux-gnu',
-                    variant='lp64d')
-    self.add_config(arch='loongarch64',
-                    os_name='linux-gnu',
-                    variant='lp64s')
-    self.add_config(arch='microblaze',
-                    os_name='linux-gnu')
-    self.add_config(arch='microblazeel',
-                    os_name='linux-gnu')
-    self.add_config(arch='mips64',
-                    os_name='linux-gnu',
-                    glibcs=[{'arch': 'mips64-n32'},
-                            {'arch': 'mips',
-                             'ccopts': '-mabi=32'},
-                            {'arch': 'mips',
-                             'variant' : 'mips16',
-                             'ccopts': '-mabi=32 -mips16'},
-                            {'arch': 'mips64',
-                             'ccopts': '-mabi=64'}])
-    self.add_config(arch='mips64',
-                    os_name='linux-gnu',
-                    variant='soft',
-                    glibcs=[{'arch': 'mips', 'variant' : 'soft',
-                             'ccopts': '-mabi=32'}])
-    self.add_config(arch='mips64el',
-                    os_name='linux-gnu',
-                    glibcs=[{'arch': 'mips64el-n32'},
-                            {'arch': 'mipsel',
-                             'ccopts': '-mabi=32'},
-                            {'arch': 'mips64el',
-                             'ccopts': '-mabi=64'}])
-    self.add_config(arch='nios2',
-                    os_name='linux-gnu')
-    self.add_config(arch='or1k',
-                    os_name='linux-gnu',
-                    glibcs=[{'variant': 'soft'},
-                            {'variant': 'hard',  'ccopts': '-mhard-float'}])
-    self.add_config(arch='powerpc',
-                    os_name='linux-gnu',
-                    variant='soft')
-    self.add_config(arch='powerpc',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant': 'power4',  'ccopts': '-mcpu=power4',  'cfg' : ["--with-cpu=power4"]},
-                            {'variant': 'power5',  'ccopts': '-mcpu=power5',  'cfg' : ["--with-cpu=power5"]},
-                            {'variant': 'power5+', 'ccopts': '-mcpu=power5+', 'cfg' : ["--with-cpu=power5+"]},
-                            {'variant': 'power6',  'ccopts': '-mcpu=power6',  'cfg' : ["--with-cpu=power6"]},
-                            {'variant': 'power6x', 'ccopts': '-mcpu=power6',  'cfg' : ["--with-cpu=power6"]},
-                            {'variant': 'power7',  'ccopts': '-mcpu=power7',  'cfg' : ["--with-cpu=power7"]},
-                            {'variant': 'power8',  'ccopts': '-mcpu=power8',  'cfg' : ["--with-cpu=power8"]},
-                            {'variant': 'power9',  'ccopts': '-mcpu=power9',  'cfg' : ["--with-cpu=power9"]},
-                            {'variant': 'power10',  'ccopts': '-mcpu=power10',  'cfg' : ["--with-cpu=power10"]},
-                            {'variant': 'power4-disable-multi-arch',  'ccopts': '-mcpu=power4',  'cfg' : ["--with-cpu=power4",  "--disable-multi-arch"]},
-                            {'variant': 'power5-disable-multi-arch',  'ccopts': '-mcpu=power5',  'cfg' : ["--with-cpu=power5",  "--disable-multi-arch"]},
-                            {'variant': 'power5+-disable-multi-arch', 'ccopts': '-mcpu=power5+', 'cfg' : ["--with-cpu=power5+", "--disable-multi-arch"]},
-                            {'variant': 'power6-disable-multi-arch',  'ccopts': '-mcpu=power6',  'cfg' : ["--with-cpu=power6",  "--disable-multi-arch"]},
-                            {'variant': 'power6x-disable-multi-arch', 'ccopts': '-mcpu=power6x', 'cfg' : ["--with-cpu=power6x", "--disable-multi-arch"]},
-                            {'variant': 'power7-disable-multi-arch',  'ccopts': '-mcpu=power7',  'cfg' : ["--with-cpu=power7",  "--disable-multi-arch"]},
-                            {'variant': 'power8-disable-multi-arch',  'ccopts': '-mcpu=power8',  'cfg' : ["--with-cpu=power8",  "--disable-multi-arch"]}])
-    self.add_config(arch='powerpc64',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant': 'power4',  'ccopts': '-mcpu=power4',  'cfg' : ["--with-cpu=power4"]},
-                            {'variant': 'power5',  'ccopts': '-mcpu=power5',  'cfg' : ["--with-cpu=power5"]},
-                            {'variant': 'power5+', 'ccopts': '-mcpu=power5+', 'cfg' : ["--with-cpu=power5+"]},
-                            {'variant': 'power6',  'ccopts': '-mcpu=power6',  'cfg' : ["--with-cpu=power6"]},
-                            {'variant': 'power6x', 'ccopts': '-mcpu=power6x', 'cfg' : ["--with-cpu=power6x"]},
-                            {'variant': 'power7',  'ccopts': '-mcpu=power7',  'cfg' : ["--with-cpu=power7"]},
-                            {'variant': 'power8',  'ccopts': '-mcpu=power8',  'cfg' : ["--with-cpu=power8"]},
-                            {'variant': 'power4-disable-multi-arch',  'ccopts': '-mcpu=power4',  'cfg' : ["--with-cpu=power4",  "--disable-multi-arch"]},
-                            {'variant': 'power5-disable-multi-arch',  'ccopts': '-mcpu=power5',  'cfg' : ["--with-cpu=power5",  "--disable-multi-arch"]},
-                            {'variant': 'power5+-disable-multi-arch', 'ccopts': '-mcpu=power5+', 'cfg' : ["--with-cpu=power5+", "--disable-multi-arch"]},
-                            {'variant': 'power6-disable-multi-arch',  'ccopts': '-mcpu=power6',  'cfg' : ["--with-cpu=power6",  "--disable-multi-arch"]},
-                            {'variant': 'power6x-disable-multi-arch', 'ccopts': '-mcpu=power6x', 'cfg' : ["--with-cpu=power6x", "--disable-multi-arch"]},
-                            {'variant': 'power7-disable-multi-arch',  'ccopts': '-mcpu=power7',  'cfg' : ["--with-cpu=power7",  "--disable-multi-arch"]},
-                            {'variant': 'power8-disable-multi-arch',  'ccopts': '-mcpu=power8',  'cfg' : ["--with-cpu=power8",  "--disable-multi-arch"]},
-                            {'variant': 'disable-multi-arch', 'cfg' : ["--disable-multi-arch"]}])
-    self.add_config(arch='powerpc64le',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant': 'power8', 'ccopts': '-mcpu=power8', 'cfg' : ["--with-cpu=power8"]},
-                            {'variant': 'power9', 'ccopts': '-mcpu=power9', 'cfg' : ["--with-cpu=power9"]},
-                            {'variant': 'power10', 'ccopts': '-mcpu=power10', 'cfg' : ["--with-cpu=power10"]},
-                            {'variant': 'power7-disable-multi-arch', 'ccopts': '-mcpu=power7', 'cfg' : ["--with-cpu=power8", "--disable-multi-arch"]},
-                            {'variant': 'power8-disable-multi-arch', 'ccopts': '-mcpu=power8', 'cfg' : ["--with-cpu=power8", "--disable-multi-arch"]},
-                            {'variant': 'power9-disable-multi-arch', 'ccopts': '-mcpu=power9', 'cfg' : ["--with-cpu=power9", "--disable-multi-arch"]},
-                            {'variant': 'power10-disable-multi-arch', 'ccopts': '-mcpu=power10', 'cfg' : ["--with-cpu=power10", "--disable-multi-arch"]},
-                            {'variant': 'disable-multi-arch', 'cfg' : ["--disable-multi-arch"]}])
-    self.add_config(arch='riscv32',
-                    os_name='linux-gnu',
-                    variant='rv32imac-ilp32')
-    self.add_config(arch='riscv32',
-                    os_name='linux-gnu',
-                    variant='rv32imafdc-ilp32')
-    self.add_config(arch='riscv32',
-                    os_name='linux-gnu',
-                    variant='rv32imafdc-ilp32d')
-    self.add_config(arch='riscv64',
-                    os_name='linux-gnu',
-                    variant='rv64imac-lp64')
-    self.add_config(arch='riscv64',
-                    os_name='linux-gnu',
-                    variant='rv64imafdc-lp64')
-    self.add_config(arch='riscv64',
-                    os_name='linux-gnu',
-                    variant='rv64imafdc-lp64d')
-    self.add_config(arch='s390x',
-                    os_name='linux-gnu',
-                    glibcs=[{},
-                            {'variant' : 'disable-multi-arch', 'cfg' : ['--disable-multi-arch']},
-                            {'variant': 'z900', 'ccopts': '-march=z900'}, # arch5
-                            {'variant': 'z10', 'ccopts': '-march=z10'},   # arch8
-                            {'variant': 'z196', 'ccopts': '-march=z196'}, # arch9
-                            {'variant': 'z13', 'ccopts': '-march=z13'},   # arch?
-                            {'arch'   : 's390', 'ccopts': '-m31'},
-                            {'arch'   : 's390', 'variant' : 'disable-multi-arch', 'cfg' : ['--disable-multi-arch'], 'ccopts' : '-m31'}])
-    self.add_config(arch='csky',
-                    os_name='linux-gnuabiv2',
-                    variant='soft')
-    self.add_config(arch='csky',
-                    os_name='linux-gnuabiv2')
-    self.add_config(arch='sh3',
-                    os_name='linux-gnu')
-    self.add_config(arch='sh3eb',
-                    os_name='linux-gnu')
-    self.add_config(arch='sh4',
-                    os_name='linux-gnu')
-    self.add_config(arch='sh4eb',
-                    os_name='linux-gnu')
-    self.add_config(arch='sh4',
-                    os_name='linux-gnu',
-                    variant='soft')
-    self.add_config(arch='sh4eb',
-                    os_name='linux-gnu',
-                    variant='soft')
-    self.add_config(arch='sparc64',
-                    os_name='linux-gnu',
-                    glibcs=[{'ccopts' : "-mcpu=niagara"},
-                            {'arch': 'sparc',
-                             'ccopts': '-m32 -mlong-double-128 -mcpu=leon3'},
-                            {'arch': 'sparcv8',
-                             'ccopts': '-m32 -mlong-double-128 -mcpu=leon3'},
-                            {'arch': 'sparcv9',
-                             'ccopts': '-m32 -mlong-double-128 -mcpu=v9'}],
-                    extra_glibcs=[{'variant': 'disable-multi-arch',
-                                   'cfg': ['--disable-multi-arch']},
-                                  {'variant': 'disable-multi-arch',
-                                   'arch': 'sparcv9',
-                                   'ccopts': '-m32 -mlong-double-128 -mcpu=v9',
-                                   'cfg': ['--disable-multi-arch']}])
-    self.add_config(arch='x86_64',
-                    os_name='gnu')
-    self.add_config(arch='x86_64',
-                    os_name='linux-gnu',
-                    glibcs=[{'cfg': ['--enable-cet']},
-                            {'variant': 'x32', 'ccopts': '-mx32'},
-                            {'arch': 'i686', 'ccopts': '-m32 -march=i686'},
-                            {'variant': 'v2', 'ccopts' : '-march=x86-64-v2'},
-                            {'variant': 'v3', 'ccopts' : '-march=x86-64-v3'},
-                            {'variant': 'v4', 'ccopts' : '-march=x86-64-v4'}],
-                    extra_glibcs=[{'variant': 'disable-multi-arch',
-                                   'cfg': ['--disable-multi-arch']},
-                                  {'variant': 'disable-multi-arch',
-                                   'arch': 'i686',
-                                   'ccopts': '-m32 -march=i686',
-                                   'cfg': ['--disable-multi-arch']},
-                                  {'arch': 'i486',
-                                   'ccopts': '-m32 -march=i486'},
-                                  {'arch': 'i586',
-                                   'ccopts': '-m32 -march=i586'},
-                                  {'variant': 'fp',
-                                   'arch': 'i686',
-                                   'ccopts': '-m32 -march=i686 -fno-omit-frame-pointer'}])
+    for cfg in CONFIGS:
+      self.add_config(**cfg)
 
   def list_configs(self, glibcs):
     for abi in glibcs:
@@ -529,6 +765,7 @@ class Glibc(object):
       self.name = '%s-%s' % (self.arch, self.os)
     else:
       self.name = '%s-%s-%s' % (self.arch, self.os, variant)
+    self.name = sys.intern(self.name)
     self.triplet = '%s-glibc-%s' % (self.arch, self.os)
     self.host_triplet = '%s-%s' % (self.arch, self.os)
     if cfg is None:
@@ -536,13 +773,18 @@ class Glibc(object):
     else:
       self.cfg = cfg
     self.ccopts = ccopts
+    # The autoconf cache file used by the last configure command.
+    self.config_cache_path = None
 
+  @functools.lru_cache(maxsize=None)
   def tool_name(self, tool):
     """Return the name of a cross-compilation tool."""
-    ctool = PATHS["compilers"] + '/' + self.compiler.name + '/bin/';
-    ctool += self.compiler.triplet + '-' + tool
-    if self.ccopts and (tool == 'gcc' or tool == 'g++'):
-      ctool = '%s %s' % (ctool, self.ccopts)
+    ctool = self.compiler.tool_prefix + tool
+    if tool == 'gcc' or tool == 'g++':
+      if self.ccopts:
+        ctool = '%s %s' % (ctool, self.ccopts)
+      if self.ctx.ccache:
+        ctool = '%s %s' % (self.ctx.ccache, ctool)
     return ctool
 
   def configure(self, extra_config_opts):
@@ -563,14 +805,23 @@ class Glibc(object):
            'STRIP=%s' % self.tool_name('strip')]
     if self.os == 'gnu':
        cmd += ['MIG=%s' % self.tool_name('mig')]
-    cmd = cmd + extra_config_opts
+    cmd += extra_config_opts
     cmd += self.cfg
+    # The cross-compile probes give the same answers on each run, so
+    # reuse them.
+    if self.ctx.config_cache:
+      self.config_cache_path = config_cache_file(self.name, cmd,
+                                                 self.compiler.tool_prefix
+                                                 + 'gcc')
+      cmd += ['--cache-file=%s' % self.config_cache_path]
     return cmd
 
   def lib_name(self, lib):
-    cmd = self.tool_name("gcc") + " -print-file-name={}".format(lib)
-    stdout = subprocess.getoutput(cmd)
-    return stdout if os.path.exists (stdout) else ""
+    for libdir in library_dirs(self.tool_name("gcc")):
+      path = os.path.join(libdir, lib)
+      if os.path.exists (path):
+        return path
+    return ""
 
   def copylibs(self):
     libgcc = ""
@@ -583,35 +834,43 @@ class Glibc(object):
 
   def build(self):
     return ['make',
-            '-j%d' % (self.ctx.build_jobs)]
+            self.ctx.make_jobs]
 
   def check(self):
     return ['make',
             'check',
             'run-built-tests=%s' % (self.ctx.run_built_tests),
-            '-j%d' % (self.ctx.build_jobs)]
+            self.ctx.make_jobs]
 
   def check_abi(self):
     return ['make',
             'check-abi',
-            '-j%d' % (self.ctx.build_jobs)]
+            self.ctx.make_jobs]
 
   def update_abi(self):
     return ['make',
             'update-abi',
-            '-j%d' % (self.ctx.build_jobs)]
+            self.ctx.make_jobs]
 
   def bench_build(self):
     return ['make',
             'bench-build',
-            '-j%d' % (self.ctx.build_jobs)]
+            self.ctx.make_jobs]
 
 
 def parallelize_type(string):
-  fields = string.split(':')
-  if len(fields) == 1:
-    return [ int(fields[0]), 1 ]
-  return [ int(fields[0]), int(fields[1]) ]
+  if ':' not in string:
+    return [ int(string), 1 ]
+  jobs, build_jobs = string.split(':', 1)
+  return [ int(jobs), int(build_jobs) ]
+
+def nice_type(string):
+  # Only root can raise the priority, so reject it before any build.
+  nice = int(string)
+  if nice < 0 and os.geteuid() != 0:
+    raise argparse.ArgumentTypeError("must not be negative for a non-root "
+                                     "user: %d" % nice)
+  return nice
 
 SPECIAL_LISTS = {
   # Most of the supported Linux ABIs
@@ -768,16 +1027,16 @@ SPECIAL_LISTS = {
 
   "arm": [
     "arm-linux-gnueabihf",
-    "arm-linux-gnueabihf-armv7-disable-multi-arch",
+    "armv7a-linux-gnueabihf-disable-multi-arch",
     "armv5-linux-gnueabihf",
     "armv6-linux-gnueabihf",
     "armv6t2-linux-gnueabihf",
-    "armv7-linux-gnueabihf",
-    "armv7-neon-linux-gnueabihf",
-    "armv7-neonhard-linux-gnueabihf",
-    "armv7-thumb-linux-gnueabihf",
-    "armv8-linux-gnueabihf",
-    "armv9-linux-gnueabihf"
+    "armv7a-linux-gnueabihf",
+    "armv7a-neon-linux-gnueabihf",
+    "armv7a-neonhard-linux-gnueabihf",
+    "armv7a-thumb-linux-gnueabihf",
+    "armv8a-linux-gnueabihf",
+    "armv9a-linux-gnueabihf"
   ],
 
   "armeb": [
@@ -785,8 +1044,8 @@ SPECIAL_LISTS = {
     "armeb-v5-linux-gnueabihf",
     "armeb-v6-linux-gnueabihf",
     "armeb-v6t2-linux-gnueabihf",
-    "armeb-v7-linux-gnueabihf",
-    "armeb-v7neon-linux-gnueabihf",
+    "armeb-v7a-linux-gnueabihf",
+    "armeb-v7a-neon-linux-gnueabihf",
     "armeb-v7neonhard-linux-gnueabihf",
   ],
 
@@ -836,6 +1095,15 @@ def get_parser():
   parser.add_argument('-k', dest='keep',
                       help='Keep old file and just run the command',
                       action='store_true', default=False)
+  parser.add_argument('--keep-going', dest='keep_going',
+                      help='Run the remaining actions of a configuration '
+                           'after a failure',
+                      action='store_true', default=False)
+  parser.add_argument('--nice', dest='nice', type=nice_type, default=0,
+                      help='Run the build commands with a lower priority')
+  parser.add_argument('--dry-run', dest='dry_run',
+                      help='Print the commands instead of running them',
+                      action='store_true', default=False)
   parser.add_argument('-t', dest='run_built_tests',
                       help='Run built tests',
                       action='store_true', default=False)
@@ -867,6 +1135,13 @@ def get_parser():
   parser.add_argument('--disable-werror', dest='disable_werror',
                       help='Do not use -Werror',
                       action='store_true', default=False)
+  parser.add_argument('--disable-config-cache', dest='config_cache',
+                      help='Do not reuse the configure results of a '
+                           'previous run',
+                      action='store_false', default=True)
+  parser.add_argument('--disable-ccache', dest='ccache',
+                      help='Do not use ccache even if it is installed',
+                      action='store_false', default=True)
   parser.add_argument('--disable-hardcoded-path-in-tests', dest='hardcoded',
                       help='Hardcode newly built glibc path in tests',
                       action='store_false', default=True)
@@ -888,11 +1163,18 @@ def get_parser():
 def main(argv):
   parser = get_parser()
   opts = parser.parse_args(argv)
-  ctx = Context(opts)
 
   read_config (opts.gccversion, opts.srcdir, opts.suffix)
 
-  configs = list(chain.from_iterable(SPECIAL_LISTS.get(c, [c]) for c in opts.configs))
+  # The build commands inherit the scheduling priority, so there is no
+  # need to change it on each spawn.
+  if opts.nice:
+    os.nice(opts.nice)
+
+  # A config can be in more than one list, and building it twice would
+  # clobber its build directory and logs.
+  configs = list(dict.fromkeys(chain.from_iterable(SPECIAL_LISTS.get(c, [c])
+                                                  for c in opts.configs)))
 
   ctx = Context(opts)
   ctx.run(opts, configs)
@@ -1,16 +1,15 @@
 # python3 compat adjustments
 
 from pathlib import Path
+import sys
 import os
 
 # Path.home was added in version 3.5.
-try:
-  Path.home()
-except:
+if sys.version_info < (3, 5):
   def _gethomedir():
-    try:
-      return os.environ['HOME']
-    except KeyError:
-      import pwd
-      return pwd.getpwuid(os.getuid()).pw_dir
-  Path.home = _gethomedir
+    home = os.environ.get('HOME')
+    if home:
+      return home
+    import pwd
+    return pwd.getpwuid(os.getuid()).pw_dir
+  Path.home = staticmethod(_gethomedir)